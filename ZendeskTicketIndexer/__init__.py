@@ -1,10 +1,10 @@
+import asyncio
 import datetime
+import functools
 import logging
 import azure.functions as func
 import os
 import sys
-import importlib.util
-import traceback
 
 # Add the current directory to sys.path first, then the parent directory
 dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -18,102 +18,99 @@ if os.path.exists(python_packages_dir):
     sys.path.insert(0, python_packages_dir)
     logging.info(f"Added .python_packages directory to sys.path: {python_packages_dir}")
 
+@functools.cache
 def check_module_exists(module_name):
     """Check if a module can be imported."""
+    import importlib.util
     return importlib.util.find_spec(module_name) is not None
 
-def main(mytimer: func.TimerRequest) -> None:
+def log_diagnostics():
     """
-    Azure Function entry point that runs on a timer trigger.
-    This function indexes Zendesk tickets into Supabase for RAG.
+    Log environment, system and dependency information.
+    Runs once per worker process, and only when DEBUG_INDEXER is set.
     """
-    utc_timestamp = datetime.datetime.utcnow().replace(
-        tzinfo=datetime.timezone.utc).isoformat()
-    
-    if mytimer.past_due:
-        logging.info('The timer is past due!')
-    
-    logging.info('========== ZENDESK TICKET INDEXER STARTED ==========')
-    logging.info('Python timer trigger function started at %s', utc_timestamp)
-    
     # Log environment variables (without sensitive values)
-    logging.info('========== ENVIRONMENT VARIABLES ==========')
+    logging.debug('========== ENVIRONMENT VARIABLES ==========')
     env_vars = [
-        "SUPABASE_URL", "SUPABASE_SERVICE_KEY", "OPENAI_API_KEY", "ZENDESK_SUBDOMAIN", 
+        "SUPABASE_URL", "SUPABASE_SERVICE_KEY", "OPENAI_API_KEY", "ZENDESK_SUBDOMAIN",
         "ZENDESK_EMAIL", "ZENDESK_API_TOKEN", "LLM_MODEL"
     ]
     for var in env_vars:
-        logging.info(f'{var} exists: {"Yes" if os.getenv(var) else "No"}')
-    
+        logging.debug(f'{var} exists: {"Yes" if os.getenv(var) else "No"}')
+
     # Log system information
-    logging.info('========== SYSTEM INFORMATION ==========')
-    logging.info(f'Python version: {sys.version}')
-    logging.info(f'Current directory: {os.getcwd()}')
-    logging.info(f'Function directory: {dir_path}')
-    logging.info(f'Parent directory: {parent_dir}')
-    logging.info(f'sys.path: {sys.path}')
-    
+    logging.debug('========== SYSTEM INFORMATION ==========')
+    logging.debug(f'Python version: {sys.version}')
+    logging.debug(f'Current directory: {os.getcwd()}')
+    logging.debug(f'Function directory: {dir_path}')
+    logging.debug(f'Parent directory: {parent_dir}')
+    logging.debug(f'sys.path: {sys.path}')
+
     # Check for required dependencies
-    logging.info('========== CHECKING DEPENDENCIES ==========')
-    required_modules = ["requests", "openai", "supabase", "dotenv"]
+    logging.debug('========== CHECKING DEPENDENCIES ==========')
+    required_modules = [
+        "httpx", "h2", "orjson", "numpy", "openai", "postgrest",
+        "tenacity", "aiolimiter", "blingfire", "tiktoken", "dotenv"
+    ]
     missing_modules = []
-    
+
     for module in required_modules:
         if check_module_exists(module):
-            logging.info(f"Module {module} is available")
+            logging.debug(f"Module {module} is available")
         else:
             logging.error(f"Module {module} is NOT available")
             missing_modules.append(module)
-    
+
     if missing_modules:
         logging.error(f"Missing required modules: {', '.join(missing_modules)}")
         logging.error("Please ensure all dependencies are installed in requirements.txt")
-        
-    # Import and run the ticket indexing functionality
+
+if os.getenv("DEBUG_INDEXER"):
+    # The diagnostics are logged at DEBUG level, below the default threshold; the level
+    # is restored afterwards so the rest of the worker does not log at DEBUG
+    root_logger = logging.getLogger()
+    previous_level = root_logger.level
+    root_logger.setLevel(logging.DEBUG)
+    try:
+        log_diagnostics()
+    finally:
+        root_logger.setLevel(previous_level)
+
+# Import the indexing modules once per worker process so warm invocations reuse them
+import zendesk_data_fetcher
+import zendesk_ticket_indexing_docs
+
+# Fail fast on a cold start if the Zendesk settings are missing
+zendesk_data_fetcher.ZendeskConfig.from_env()
+
+def main(mytimer: func.TimerRequest) -> None:
+    """
+    Azure Function entry point that runs on a timer trigger.
+    This function indexes Zendesk tickets into Supabase for RAG.
+    """
+    utc_timestamp = datetime.datetime.utcnow().replace(
+        tzinfo=datetime.timezone.utc).isoformat()
+
+    if mytimer.past_due:
+        logging.info('The timer is past due!')
+
+    logging.info('========== ZENDESK TICKET INDEXER STARTED ==========')
+    logging.info('Python timer trigger function started at %s', utc_timestamp)
+
+    # Run the ticket indexing functionality
     try:
         logging.info('========== STARTING TICKET INDEXING ==========')
-        
-        # Try to manually import the required modules to see detailed errors
-        try:
-            logging.info("Attempting to import requests...")
-            import requests
-            logging.info("Successfully imported requests")
-        except ImportError as e:
-            logging.error(f"Failed to import requests: {str(e)}")
-            
-        try:
-            logging.info("Attempting to import openai...")
-            import openai
-            logging.info("Successfully imported openai")
-        except ImportError as e:
-            logging.error(f"Failed to import openai: {str(e)}")
-            
-        try:
-            logging.info("Attempting to import supabase...")
-            from supabase import create_client
-            logging.info("Successfully imported supabase")
-        except ImportError as e:
-            logging.error(f"Failed to import supabase: {str(e)}")
-        
-        # Now try to import the modules
-        logging.info("Importing zendesk_data_fetcher...")
-        import zendesk_data_fetcher
-        logging.info("Successfully imported zendesk_data_fetcher")
-        
-        logging.info("Importing zendesk_ticket_indexing_docs...")
-        import zendesk_ticket_indexing_docs
-        logging.info("Successfully imported zendesk_ticket_indexing_docs")
-        
+
         # Run the indexing function
-        import asyncio
         logging.info("Running zendesk_ticket_indexing_docs.main()...")
         asyncio.run(zendesk_ticket_indexing_docs.main())
         logging.info('========== TICKET INDEXING COMPLETED SUCCESSFULLY ==========')
     except Exception as e:
+        import traceback
         logging.error(f'Error during ticket indexing: {str(e)}')
         logging.error(f'Traceback: {traceback.format_exc()}')
-    
+
     logging.info('========== ZENDESK TICKET INDEXER COMPLETED ==========')
-    logging.info('Python timer trigger function completed at %s', 
+    logging.info('Python timer trigger function completed at %s',
                  datetime.datetime.utcnow().replace(
                      tzinfo=datetime.timezone.utc).isoformat())
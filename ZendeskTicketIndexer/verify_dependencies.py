@@ -20,14 +20,14 @@ def check_module_version(module_name):
 def check_supabase_internals():
     """Check the internal structure of the supabase module."""
     try:
-        from supabase._sync.client import SyncClient
-        logging.info("SyncClient class is available")
+        from postgrest import AsyncPostgrestClient
+        logging.info("AsyncPostgrestClient class is available")
         
-        # Check if SyncClient.__init__ accepts proxy parameter
+        # Log the AsyncPostgrestClient.__init__ parameters
         import inspect
-        sig = inspect.signature(SyncClient.__init__)
+        sig = inspect.signature(AsyncPostgrestClient.__init__)
         params = list(sig.parameters.keys())
-        logging.info(f"SyncClient.__init__ parameters: {params}")
+        logging.info(f"AsyncPostgrestClient.__init__ parameters: {params}")
         
         # Check httpx version
         try:
@@ -1,7 +1,11 @@
 import os
-import base64
-import requests
-from typing import List, Dict, Any, Optional
+import sys
+import math
+import asyncio
+import functools
+import httpx
+import orjson
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import logging
@@ -17,150 +21,400 @@ try:
 except ImportError:
     logging.info("python-dotenv not available, assuming environment variables are already set")
 
-@dataclass
+# Retry policy for transient Zendesk errors (GET requests only)
+RETRY_STATUS_CODES = {502, 503, 504}
+MAX_RETRIES = 5
+RETRY_BACKOFF_FACTOR = 0.5
+
+# Rate limiting: wait this long on a 429 without a Retry-After header, and slow
+# down once fewer than RATE_LIMIT_LOW_WATERMARK requests are left in the window
+DEFAULT_RETRY_AFTER = 10
+RATE_LIMIT_LOW_WATERMARK = 50
+
+# Maximum number of per-ticket requests in flight at once
+MAX_CONCURRENT_REQUESTS = 8
+
+# Exports of at most this many tickets fetch their comments per ticket instead of
+# scanning the (rate-limited) ticket event export
+PER_TICKET_COMMENTS_LIMIT = 200
+
+def _to_timestamp(value: str) -> float:
+    """Convert a Zendesk ISO 8601 timestamp to a Unix timestamp."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+class ZendeskAPIError(Exception):
+    """Error response from the Zendesk API."""
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+@dataclass(frozen=True)
 class ZendeskConfig:
     subdomain: str
     email: str
     api_token: str
     
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def from_env(cls) -> 'ZendeskConfig':
-        """Create ZendeskConfig from environment variables."""
+        """
+        Create ZendeskConfig from environment variables.
+        The environment is read once per process; raises RuntimeError if a variable is missing.
+        """
+        env_vars = ["ZENDESK_SUBDOMAIN", "ZENDESK_EMAIL", "ZENDESK_API_TOKEN"]
+        subdomain, email, api_token = (os.getenv(var, "") for var in env_vars)
+        if not all([subdomain, email, api_token]):
+            missing = [var for var in env_vars if not os.getenv(var)]
+            raise RuntimeError(f"Missing Zendesk environment variables: {', '.join(missing)}")
         return cls(
-            subdomain=os.getenv("ZENDESK_SUBDOMAIN", ""),
-            email=os.getenv("ZENDESK_EMAIL", ""),
-            api_token=os.getenv("ZENDESK_API_TOKEN", "")
+            subdomain=subdomain,
+            email=email,
+            api_token=api_token
         )
 
 class ZendeskAPI:
     def __init__(self, config: ZendeskConfig):
         self.config = config
         self.base_url = f"https://{config.subdomain}.zendesk.com/api/v2"
-        self.headers = self._create_auth_headers()
+        self.ticket_url_template = f"https://{config.subdomain}.zendesk.com/agent/tickets/{{}}"
+        # Incremental export cursor to resume from on the next run
+        self.after_cursor: Optional[str] = None
+        # One pooled client per API instance so TCP/TLS connections are reused
+        # across pagination calls; the transport retries failed connects.
+        # HTTP/2 and the pool limits are transport settings (httpx ignores them on
+        # the client when a transport is given).
+        # Idle connections are kept for 60s (httpx defaults to 5s) so they survive
+        # rate-limit waits instead of paying DNS + TLS setup again.
+        limits = httpx.Limits(max_connections=32, max_keepalive_connections=20, keepalive_expiry=60.0)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=httpx.BasicAuth(f"{config.email}/token", config.api_token),
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=MAX_RETRIES)
+        )
 
-    def _create_auth_headers(self) -> Dict[str, str]:
-        """Create authentication headers for Zendesk API."""
-        credentials = f"{self.config.email}/token:{self.config.api_token}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        return {
-            "Authorization": f"Basic {encoded_credentials}",
-            "Content-Type": "application/json"
-        }
+    async def __aenter__(self) -> 'ZendeskAPI':
+        return self
 
-    def _make_request(self, endpoint: str, method: str = "GET", params: Optional[Dict] = None) -> Dict:
-        """Make a request to the Zendesk API."""
-        url = f"{self.base_url}/{endpoint}"
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client and its pooled connections."""
+        await self._client.aclose()
+
+    async def _make_request(self, endpoint: str, method: str = "GET", params: Optional[Dict] = None,
+                            url: Optional[str] = None) -> Dict:
+        """
+        Make a request to the Zendesk API.
+        If url is given (e.g. a pagination link), it is used as-is instead of the endpoint.
+        Endpoints are resolved against base_url by the client.
+        """
+        url = url or endpoint
         try:
-            logging.info(f"Making request to Zendesk API: {method} {url}")
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.headers,
-                params=params
-            )
+            logging.info("Making request to Zendesk API: %s %s", method, url)
+            attempt = 0
+            while True:
+                response = await self._client.request(
+                    method=method,
+                    url=url,
+                    params=params
+                )
+                if response.status_code == 429:
+                    # Rate limited: wait as long as Zendesk asks, then try again
+                    retry_after = float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+                    logging.warning(f"Zendesk API rate limit reached, retrying in {retry_after}s")
+                    await asyncio.sleep(retry_after)
+                    continue
+                if method == "GET" and response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                    delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+                    logging.warning(f"Zendesk API returned {response.status_code}, retrying in {delay}s")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                break
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as e:
+
+            # Back off a little before the rate limit is actually hit
+            remaining = response.headers.get("X-Rate-Limit-Remaining")
+            if remaining is not None and int(remaining) < RATE_LIMIT_LOW_WATERMARK:
+                await asyncio.sleep(1)
+            # orjson parses the raw bytes directly, without a separate decode step
+            return orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
             logging.error(f"HTTP Error from Zendesk API: {e}")
             logging.error(f"Response content: {e.response.text}")
-            raise Exception(f"Zendesk API HTTP Error: {e}. Response: {e.response.text}")
-        except requests.exceptions.ConnectionError as e:
+            raise ZendeskAPIError(f"Zendesk API HTTP Error: {e}. Response: {e.response.text}", e.response.status_code)
+        except httpx.ConnectError as e:
             logging.error(f"Connection Error to Zendesk API: {e}")
             raise Exception(f"Failed to connect to Zendesk API: {e}")
-        except requests.exceptions.Timeout as e:
+        except httpx.TimeoutException as e:
             logging.error(f"Timeout Error from Zendesk API: {e}")
             raise Exception(f"Zendesk API request timed out: {e}")
-        except requests.exceptions.RequestException as e:
+        except httpx.RequestError as e:
             logging.error(f"Error making request to Zendesk API {endpoint}: {e}")
             raise Exception(f"Zendesk API request failed: {e}")
         except Exception as e:
             logging.error(f"Unexpected error when calling Zendesk API: {e}")
             raise Exception(f"Unexpected error with Zendesk API: {e}")
 
-    def get_all_tickets(self, include_comments: bool = True) -> List[Dict[str, Any]]:
+    async def _iter_pages(self, endpoint: str, key: str, params: Optional[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
         """
-        Fetch all tickets from Zendesk.
-        If include_comments is True, also fetch comments for each ticket.
+        Yield every record of a list endpoint using cursor-based pagination.
+        Follows links.next until meta.has_more is false. Only one page is held
+        in memory at a time.
         """
-        tickets = []
-        page = 1
-        while True:
-            params = {
-                "page": page,
-                "per_page": 100,
-                "sort_by": "created_at",
-                "sort_order": "desc"
-            }
-            response = self._make_request("tickets.json", params=params)
+        response = await self._make_request(endpoint, params={"page[size]": 100, **(params or {})})
+        while response:
+            for record in response.get(key, []):
+                yield record
             
-            if not response or "tickets" not in response:
+            next_url = response.get("links", {}).get("next")
+            if not response.get("meta", {}).get("has_more") or not next_url:
                 break
-                
-            current_tickets = response["tickets"]
-            if not current_tickets:
-                break
-                
-            if include_comments:
-                for ticket in current_tickets:
-                    ticket["comments"] = self.get_ticket_comments(ticket["id"])
-                    
-            tickets.extend(current_tickets)
-            page += 1
+            response = await self._make_request(endpoint, url=next_url)
+
+    def iter_tickets(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield all tickets from Zendesk, newest first, one page at a time (without comments)."""
+        return self._iter_pages("tickets.json", "tickets", params={"sort": "-id"})
+
+    async def get_all_tickets(self, include_comments: bool = True) -> List[Dict[str, Any]]:
+        """
+        Fetch all tickets from Zendesk, newest first.
+        If include_comments is True, also fetch comments for each ticket.
+        """
+        tickets = [ticket async for ticket in self.iter_tickets()]
+
+        if include_comments and tickets:
+            comments_by_ticket = await self.get_comments_by_ticket(tickets)
+            for ticket in tickets:
+                ticket["comments"] = comments_by_ticket.get(ticket["id"], [])
             
         return tickets
 
-    def get_ticket_comments(self, ticket_id: int) -> List[Dict[str, Any]]:
+    async def get_ticket_comments(self, ticket_id: int) -> List[Dict[str, Any]]:
         """Fetch all comments for a specific ticket."""
-        response = self._make_request(f"tickets/{ticket_id}/comments.json")
+        response = await self._make_request(f"tickets/{ticket_id}/comments.json")
         return response.get("comments", [])
 
-    def get_users(self) -> List[Dict[str, Any]]:
-        """Fetch all users from Zendesk."""
-        users = []
-        page = 1
+    async def get_ticket_comment_bodies(self, ticket_id: int) -> AsyncIterator[str]:
+        """Yield the body of each comment of a specific ticket, following pagination."""
+        async for comment in self._iter_pages(f"tickets/{ticket_id}/comments.json", "comments"):
+            yield comment.get("body", "")
+
+    async def _iter_comment_event_pages(self, tickets: List[Dict[str, Any]]) -> AsyncIterator[Tuple[float, List[Tuple[int, Dict[str, Any]]]]]:
+        """
+        Yield (position, [(ticket_id, comment_event), ...]) for each page of comments of many tickets.
+
+        Uses the incremental ticket event export with the comment_events sideload,
+        which returns up to 1000 events per page, instead of one comments request
+        per ticket. Events are read from the oldest ticket's creation time so every
+        comment of every requested ticket is covered. All comments made before
+        position have been yielded once a page is returned (position is infinite
+        on the last page).
+        """
+        ticket_ids = {ticket["id"] for ticket in tickets}
+        start_time = int(min(_to_timestamp(ticket["created_at"]) for ticket in tickets))
+        # Pages overlap at end_time, so a comment at that time can be returned twice;
+        # only the ids of comments at the boundary need to be remembered
+        seen_comment_ids = set()
         while True:
             params = {
-                "page": page,
-                "per_page": 100
+                "start_time": start_time,
+                "include": "comment_events"
             }
-            response = self._make_request("users.json", params=params)
+            response = await self._make_request("incremental/ticket_events.json", params=params)
+            end_time = response.get("end_time")
             
-            if not response or "users" not in response:
-                break
-                
-            current_users = response["users"]
-            if not current_users:
+            comments = []
+            boundary_comment_ids = set()
+            for event in response.get("ticket_events", []):
+                ticket_id = event.get("ticket_id")
+                if ticket_id not in ticket_ids:
+                    continue
+                timestamp = event.get("timestamp")
+                for child_event in event.get("child_events", []):
+                    comment_id = child_event.get("id")
+                    if child_event.get("event_type") != "Comment" or comment_id in seen_comment_ids:
+                        continue
+                    if timestamp is None or end_time is None or timestamp >= end_time:
+                        boundary_comment_ids.add(comment_id)
+                    comments.append((ticket_id, child_event))
+            
+            if response.get("end_of_stream") or not end_time:
+                yield math.inf, comments
                 break
-                
-            users.extend(current_users)
-            page += 1
+            yield end_time, comments
             
-        return users
+            if end_time <= start_time:
+                # A full page of events sharing one timestamp would be requested forever
+                logging.warning(f"Ticket event export did not advance past {start_time}, skipping to the next second")
+                end_time = start_time + 1
+            start_time = end_time
+            seen_comment_ids = boundary_comment_ids
+
+    async def _iter_comment_events(self, tickets: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (ticket_id, comment_event) pairs for the comments of many tickets at once."""
+        async for _, comments in self._iter_comment_event_pages(tickets):
+            for ticket_id, comment in comments:
+                yield ticket_id, comment
+
+    async def get_comments_by_ticket(self, tickets: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        """Fetch the comments of many tickets at once, keyed by ticket id."""
+        comments_by_ticket = {ticket["id"]: [] for ticket in tickets}
+        async for ticket_id, comment in self._iter_comment_events(tickets):
+            comments_by_ticket[ticket_id].append(comment)
+        return comments_by_ticket
 
-    def get_organizations(self) -> List[Dict[str, Any]]:
+    async def get_comment_bodies_by_ticket(self, tickets: List[Dict[str, Any]]) -> Dict[int, List[str]]:
+        """
+        Fetch only the comment bodies of many tickets at once, keyed by ticket id.
+        The comment events themselves are dropped as soon as their body is read.
+        """
+        bodies_by_ticket = {ticket["id"]: [] for ticket in tickets}
+        try:
+            async for ticket_id, comment in self._iter_comment_events(tickets):
+                bodies_by_ticket[ticket_id].append(comment.get("body", ""))
+        except ZendeskAPIError as e:
+            # The incremental exports are only available to admins
+            if e.status_code != 403:
+                raise
+            logging.warning("Ticket event export not permitted, fetching comments per ticket")
+            return await self.get_comment_bodies_per_ticket([ticket["id"] for ticket in tickets])
+        return bodies_by_ticket
+
+    async def get_comments_bulk(self, ticket_ids: List[int]) -> Dict[int, List[str]]:
+        """
+        Fetch the comment bodies of the given ticket ids, keyed by ticket id.
+
+        Up to PER_TICKET_COMMENTS_LIMIT ids are fetched per ticket. Larger lists are looked
+        up with the show_many endpoint, 100 ids per request, to learn their creation times;
+        their comments are then read in bulk by get_comment_bodies_by_ticket.
+        """
+        # The event export is scanned from the oldest ticket's creation, which only pays off for many tickets
+        if len(ticket_ids) <= PER_TICKET_COMMENTS_LIMIT:
+            return await self.get_comment_bodies_per_ticket(ticket_ids)
+        chunks = [ticket_ids[i:i + 100] for i in range(0, len(ticket_ids), 100)]
+        responses = await asyncio.gather(*(
+            self._make_request("tickets/show_many.json", params={"ids": ",".join(map(str, chunk))})
+            for chunk in chunks
+        ))
+        tickets = [ticket for response in responses for ticket in response.get("tickets", [])]
+        if not tickets:
+            return {}
+        return await self.get_comment_bodies_by_ticket(tickets)
+
+    async def get_comment_bodies_per_ticket(self, ticket_ids: List[int]) -> Dict[int, List[str]]:
+        """
+        Fetch the comment bodies of each ticket with one request per ticket.
+        Requests are dispatched concurrently, at most MAX_CONCURRENT_REQUESTS at a time.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def fetch_bodies(ticket_id: int) -> List[str]:
+            async with semaphore:
+                return [body async for body in self.get_ticket_comment_bodies(ticket_id)]
+
+        bodies = await asyncio.gather(*(fetch_bodies(ticket_id) for ticket_id in ticket_ids))
+        return dict(zip(ticket_ids, bodies))
+
+    async def get_users(self) -> List[Dict[str, Any]]:
+        """Fetch all users from Zendesk."""
+        return [user async for user in self._iter_pages("users.json", "users")]
+
+    async def get_organizations(self) -> List[Dict[str, Any]]:
         """Fetch all organizations from Zendesk."""
-        orgs = []
-        page = 1
-        while True:
-            params = {
-                "page": page,
-                "per_page": 100
-            }
-            response = self._make_request("organizations.json", params=params)
+        return [org async for org in self._iter_pages("organizations.json", "organizations")]
+
+    async def _export_tickets(self, status: str, start_time: int, cursor: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch tickets with the given status from the cursor-based incremental ticket export.
+        Records the last cursor in after_cursor. Like the ticket event export, this
+        endpoint is only available to admins.
+        """
+        params = {"cursor": cursor} if cursor else {"start_time": start_time}
+        response = await self._make_request("incremental/tickets/cursor.json", params=params)
+
+        # A ticket updated several times during the export window may appear more than once;
+        # only its latest copy counts, so a ticket reopened after being solved is dropped
+        results_by_id = {}
+        while response:
+            for ticket in response.get("tickets", []):
+                if ticket.get("status") == status:
+                    results_by_id[ticket["id"]] = ticket
+                else:
+                    results_by_id.pop(ticket["id"], None)
             
-            if not response or "organizations" not in response:
-                break
-                
-            current_orgs = response["organizations"]
-            if not current_orgs:
+            self.after_cursor = response.get("after_cursor") or self.after_cursor
+            if response.get("end_of_stream") or not response.get("after_url"):
                 break
-                
-            orgs.extend(current_orgs)
-            page += 1
+            response = await self._make_request("incremental/tickets/cursor.json", url=response["after_url"])
+        return list(results_by_id.values())
+
+    def _ticket_details(self, ticket: Dict[str, Any], comments: List[str]) -> Dict[str, Any]:
+        """Create a ticket details dictionary from an exported ticket and its comment bodies."""
+        return {
+            'id': ticket.get('id'),
+            'url': self.ticket_url_template.format(ticket.get('id')),
+            'subject': ticket.get('subject', 'No subject'),
+            'description': ticket.get('description', ''),
+            'created_at': ticket.get('created_at'),
+            'updated_at': ticket.get('updated_at'),
+            'organization_id': ticket.get('organization_id'),
+            'status': ticket.get('status'),
+            'priority': ticket.get('priority'),
+            'comments': comments,
+            'requester': ticket.get('requester_id'),
+            'assignee': ticket.get('assignee_id'),
+            'tags': ticket.get('tags', [])
+        }
+
+    async def iter_ticket_details(self, status: str = "solved", start_time: int = 0,
+                                  cursor: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield ticket details (see get_ticket_details) as soon as each ticket's comments are known.
+
+        When the export returns at most PER_TICKET_COMMENTS_LIMIT tickets (the usual
+        incremental run), their comments are fetched per ticket. The event export would
+        have to be read from the oldest ticket's creation time, which for one re-solved
+        old ticket can mean scanning years of events at about 10 requests per minute.
+
+        Otherwise the comment events are read in a single pass. A ticket cannot have comments newer
+        than its updated_at, so it is complete, and yielded, once the event stream has
+        moved past that time. Tickets are therefore yielded oldest update first, while
+        later events are still being fetched.
+
+        Args:
+            status: Filter tickets by status (default: "solved")
+            start_time: Unix timestamp to export from when no cursor is given
+            cursor: Export cursor returned by a previous run
+        """
+        results = await self._export_tickets(status, start_time, cursor)
+        logging.info(f"Found {len(results)} tickets with status '{status}'")
+        if not results:
+            return
+
+        if len(results) <= PER_TICKET_COMMENTS_LIMIT:
+            bodies_by_ticket = await self.get_comment_bodies_per_ticket([ticket["id"] for ticket in results])
+            for ticket in results:
+                yield self._ticket_details(ticket, bodies_by_ticket[ticket["id"]])
+            return
+
+        pending = sorted(results, key=lambda ticket: _to_timestamp(ticket["updated_at"]))
+        bodies_by_ticket = {ticket["id"]: [] for ticket in results}
+        next_ready = 0
+        async for position, comments in self._iter_comment_event_pages(results):
+            for ticket_id, comment in comments:
+                bodies_by_ticket[ticket_id].append(comment.get("body", ""))
             
-        return orgs
+            while next_ready < len(pending) and _to_timestamp(pending[next_ready]["updated_at"]) < position:
+                ticket = pending[next_ready]
+                next_ready += 1
+                yield self._ticket_details(ticket, bodies_by_ticket.pop(ticket["id"]))
 
-    def get_ticket_details(self, status: str = "solved") -> List[Dict[str, Any]]:
+    async def get_ticket_details(self, status: str = "solved", start_time: int = 0,
+                                 cursor: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Fetch specific ticket details:
         - ticket_url
@@ -171,78 +425,37 @@ class ZendeskAPI:
         - organisation_id (organization_id)
         - comments (concatenated comment texts)
 
+        Tickets are read from the cursor-based incremental ticket export, which has
+        no 1000-result cap. Pass the cursor saved from a previous run (see
+        after_cursor) to only fetch tickets changed since then.
+
         Args:
             status: Filter tickets by status (default: "solved")
+            start_time: Unix timestamp to export from when no cursor is given
+            cursor: Export cursor returned by a previous run
         """
-        tickets = []
-        page = 1
-        while True:
-            # Use the search endpoint with a query to filter by status
-            params = {
-                "page": page,
-                "per_page": 100,
-                "query": f"type:ticket status:{status}",
-                "sort_by": "created_at",
-                "sort_order": "desc"
-            }
-            response = self._make_request("search.json", params=params)
-            
-            if not response or "results" not in response:
-                break
-                
-            current_tickets = response.get("results", [])
-            if not current_tickets:
-                break
-                
-            for ticket in current_tickets:
-                # Get comments for this ticket
-                comments = self.get_ticket_comments(ticket['id'])
-                # Extract only the comment bodies and join them with a separator
-                comment_texts = [comment.get('body', '') for comment in comments]
-                
-                # Create a ticket details dictionary
-                ticket_details = {
-                    'id': ticket.get('id'),
-                    'url': f"https://{self.config.subdomain}.zendesk.com/agent/tickets/{ticket.get('id')}",
-                    'subject': ticket.get('subject', 'No subject'),
-                    'description': ticket.get('description', ''),
-                    'created_at': ticket.get('created_at'),
-                    'updated_at': ticket.get('updated_at'),
-                    'organization_id': ticket.get('organization_id'),
-                    'status': ticket.get('status'),
-                    'priority': ticket.get('priority'),
-                    'comments': comment_texts,
-                    'requester': ticket.get('requester_id'),
-                    'assignee': ticket.get('assignee_id'),
-                    'tags': ticket.get('tags', [])
-                }
-                
-                tickets.append(ticket_details)
-                
-            page += 1
-            if len(current_tickets) < 100:  # Last page
-                break
-                
-        logging.info(f"Found {len(tickets)} tickets with status '{status}'")
-        return tickets
+        return [ticket async for ticket in self.iter_ticket_details(status, start_time, cursor)]
 
-def main():
+async def main():
     """Test the ZendeskAPI class."""
     config = ZendeskConfig.from_env()
-    zendesk = ZendeskAPI(config)
-    
-    # Get ticket details
-    tickets = zendesk.get_ticket_details()
+    async with ZendeskAPI(config) as zendesk:
+        # Get ticket details
+        tickets = await zendesk.get_ticket_details()
     
-    # Print ticket information
+    # Print ticket information in a single write
+    lines = []
     for i, ticket in enumerate(tickets[:5]):  # Print first 5 tickets only
-        print(f"\nTicket #{i+1}:")
-        print(f"ID: {ticket['id']}")
-        print(f"URL: {ticket['url']}")
-        print(f"Subject: {ticket['subject']}")
-        print(f"Created: {ticket['created_at']}")
-        print(f"Updated: {ticket['updated_at']}")
-        print(f"Comments: {len(ticket['comments'])}")
+        lines.extend([
+            f"\nTicket #{i+1}:",
+            f"ID: {ticket['id']}",
+            f"URL: {ticket['url']}",
+            f"Subject: {ticket['subject']}",
+            f"Created: {ticket['created_at']}",
+            f"Updated: {ticket['updated_at']}",
+            f"Comments: {len(ticket['comments'])}"
+        ])
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,8 +1,10 @@
 import os
+import re
+import bisect
 import asyncio
+import functools
 import logging
-from typing import List, Dict, Any
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 
@@ -24,20 +26,87 @@ except ImportError:
 
 # Try to import OpenAI
 try:
-    from openai import AsyncOpenAI
+    from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
 except ImportError:
     logging.warning("OpenAI package not available")
     DEPENDENCIES_AVAILABLE = False
     MISSING_DEPENDENCIES.append("openai")
 
-# Try to import Supabase
+# Try to import Supabase (its async PostgREST client)
 try:
-    from supabase import create_client, Client
+    from postgrest import AsyncPostgrestClient
+    from postgrest.types import ReturnMethod
+    from postgrest.exceptions import APIError
 except ImportError:
     logging.warning("Supabase package not available")
     DEPENDENCIES_AVAILABLE = False
     MISSING_DEPENDENCIES.append("supabase")
 
+# Try to import httpx (used by the Supabase client)
+try:
+    import httpx
+except ImportError:
+    logging.warning("httpx package not available")
+    DEPENDENCIES_AVAILABLE = False
+    MISSING_DEPENDENCIES.append("httpx")
+
+# Try to import orjson for fast serialization of embeddings
+try:
+    import orjson
+except ImportError:
+    logging.warning("orjson package not available")
+    DEPENDENCIES_AVAILABLE = False
+    MISSING_DEPENDENCIES.append("orjson")
+
+# Try to import numpy for compact embedding storage
+try:
+    import numpy as np
+except ImportError:
+    logging.warning("numpy package not available")
+    DEPENDENCIES_AVAILABLE = False
+    MISSING_DEPENDENCIES.append("numpy")
+
+# Try to import blingfire for sentence splitting
+try:
+    import blingfire
+except ImportError:
+    logging.warning("blingfire package not available")
+    DEPENDENCIES_AVAILABLE = False
+    MISSING_DEPENDENCIES.append("blingfire")
+
+# Try to import tiktoken for counting tokens
+try:
+    import tiktoken
+except ImportError:
+    logging.warning("tiktoken package not available")
+    DEPENDENCIES_AVAILABLE = False
+    MISSING_DEPENDENCIES.append("tiktoken")
+
+# Try to import tenacity for retries
+try:
+    from tenacity import retry, retry_if_exception, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+except ImportError:
+    logging.warning("tenacity package not available")
+    DEPENDENCIES_AVAILABLE = False
+    MISSING_DEPENDENCIES.append("tenacity")
+
+# Try to import aiolimiter for rate limiting
+try:
+    from aiolimiter import AsyncLimiter
+except ImportError:
+    logging.warning("aiolimiter package not available")
+    DEPENDENCIES_AVAILABLE = False
+    MISSING_DEPENDENCIES.append("aiolimiter")
+
+# Try to import asyncpg and pgvector for bulk loading over a direct Postgres connection
+# (optional: without them chunks are stored through the Supabase REST API)
+try:
+    import asyncpg
+    from pgvector.utils import HalfVector
+except ImportError:
+    logging.info("asyncpg/pgvector not available, chunks will be stored through the Supabase REST API")
+    asyncpg = None
+
 # Try to import ZendeskAPI
 try:
     from zendesk_data_fetcher import ZendeskAPI, ZendeskConfig
@@ -48,131 +117,288 @@ except ImportError:
 
 # Initialize clients only if dependencies are available
 if DEPENDENCIES_AVAILABLE:
-    # Initialize OpenAI and Supabase clients
-    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # Connection pool settings shared by the OpenAI and Supabase HTTP clients
+    HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+    HTTP_TIMEOUT = 60
+
+    # Async OpenAI client for the current run (see create_openai_client)
+    openai_client = None
+
+    def create_openai_client() -> AsyncOpenAI:
+        """
+        Create an OpenAI client on an HTTP/2 connection pool.
+        Concurrent embedding requests are multiplexed over a few long-lived connections,
+        and the client is bound to the running event loop, so main() creates one per run.
+        (OpenAI retries are disabled here because create_embeddings retries with backoff itself)
+        """
+        http_client = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, http_client=http_client)
+
+    # Keep embedding requests under the account's requests-per-minute limit
+    openai_limiter = AsyncLimiter(int(os.getenv("OPENAI_RPM", "3000")), 60)
     
-    # Create Supabase client with direct initialization to avoid proxy issues
-    try:
-        # First try with standard initialization
-        from supabase import create_client
-        
-        # Get Supabase credentials from environment
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-        
-        # Direct initialization of SyncClient to bypass proxy issues
-        try:
-            # Try standard client creation first
-            supabase = create_client(supabase_url, supabase_key)
-        except TypeError as e:
-            if "unexpected keyword argument 'proxy'" in str(e):
-                logging.info("Using direct Supabase client initialization to avoid proxy issues")
-                # Import necessary components for direct initialization
-                from supabase._sync.client import SyncClient
-                from postgrest._sync.client import SyncQueryBuilder
-                
-                # Create client directly without using create_client function
-                supabase = SyncClient(supabase_url, supabase_key, {})
-                
-                # Initialize the client's components manually if needed
-                if not hasattr(supabase, 'table'):
-                    logging.info("Initializing Supabase table interface manually")
-                    schema = "public"
-                    rest_url = f"{supabase_url}/rest/v1"
-                    supabase.postgrest = SyncQueryBuilder(rest_url, {
-                        "Authorization": f"Bearer {supabase_key}",
-                        "apikey": supabase_key
-                    }, schema)
-                    
-                    # Add table method
-                    supabase.table = lambda table_name: supabase.postgrest.from_(table_name)
-            else:
-                # If it's a different error, re-raise it
-                raise
-    except Exception as e:
-        logging.error(f"Failed to initialize Supabase client: {str(e)}")
-        raise
+    # Get Supabase credentials from environment
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
+
+    # Async Supabase client for the current run (see create_supabase_client)
+    supabase = None
+
+    # PostgREST error codes for a database it cannot reach or that timed out
+    TRANSIENT_POSTGREST_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+    def is_transient_status(status_code: int) -> bool:
+        """Whether a response status is worth retrying (rate limited or a server error)."""
+        return status_code == 429 or status_code >= 500
+
+    def is_transient_supabase_error(e: BaseException) -> bool:
+        """Whether a failed Supabase request is worth retrying."""
+        if isinstance(e, httpx.HTTPError):
+            return True
+        if isinstance(e, APIError):
+            # postgrest only reports the HTTP status as the code of responses without a JSON body
+            # (Postgres SQLSTATE codes, such as 22021, are five characters long)
+            code = str(e.code)
+            return code in TRANSIENT_POSTGREST_CODES or (len(code) == 3 and code.isdigit() and is_transient_status(int(code)))
+        return False
+
+    async def raise_for_transient_status(response: httpx.Response):
+        """
+        Raise httpx.HTTPStatusError for 429 and 5xx responses.
+        postgrest turns error responses into an APIError that does not keep the status,
+        so transient ones are raised here, where the status is still known.
+        """
+        if is_transient_status(response.status_code):
+            response.raise_for_status()
+
+    class SupabaseRestClient(AsyncPostgrestClient):
+        """PostgREST client whose session uses HTTP/2 and the shared pool settings."""
+
+        def create_session(self, base_url: str, headers: Dict[str, str], timeout) -> httpx.AsyncClient:
+            return httpx.AsyncClient(
+                base_url=base_url, headers=headers, timeout=timeout, http2=True, limits=HTTP_LIMITS,
+                event_hooks={"response": [raise_for_transient_status]}
+            )
+
+    def create_supabase_client() -> AsyncPostgrestClient:
+        """
+        Create an async client for the Supabase REST API.
+        The client is bound to the running event loop, so main() creates one per run.
+        """
+        client = SupabaseRestClient(f"{supabase_url}/rest/v1", headers={"apikey": supabase_key}, timeout=HTTP_TIMEOUT)
+        client.auth(supabase_key)
+        return client
+
+    # Direct Postgres connection string of the Supabase database; when set, chunks are bulk loaded with COPY
+    supabase_db_url = os.getenv("SUPABASE_DB_URL")
+
+    # Postgres connection pool for the current run, or None to use the REST API (see create_db_pool)
+    db_pool = None
+
+    async def register_halfvec(conn):
+        """
+        Send embeddings to Postgres as binary halfvec values.
+        Supabase installs pgvector in the extensions schema rather than public, so the
+        schema of the halfvec type is looked up instead of assumed.
+        """
+        schema = await conn.fetchval(
+            "SELECT n.nspname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace "
+            "WHERE t.typname = 'halfvec'"
+        )
+        if schema is None:
+            raise ValueError("The halfvec type was not found, is the pgvector extension (0.7 or later) installed?")
+        await conn.set_type_codec(
+            "halfvec",
+            schema=schema,
+            encoder=HalfVector._to_db_binary,
+            decoder=HalfVector._from_db_binary,
+            format="binary"
+        )
+
+    async def create_db_pool():
+        """
+        Create a Postgres connection pool for bulk loading chunks with COPY.
+        Returns None when SUPABASE_DB_URL is not set or asyncpg is not installed.
+        """
+        if not supabase_db_url:
+            return None
+        if asyncpg is None:
+            logging.warning("SUPABASE_DB_URL is set but asyncpg/pgvector are not available, using the Supabase REST API")
+            return None
+        # Without a statement cache the pool also works through Supabase's transaction pooler
+        return await asyncpg.create_pool(
+            supabase_db_url, min_size=1, max_size=2, statement_cache_size=0, init=register_halfvec
+        )
 
     # Cache for Zendesk tickets
     _zendesk_tickets_cache = None
 
-    @dataclass
-    class ProcessedChunk:
-        url: str
-        chunk_number: int
-        title: str
-        summary: str
-        content: str
-        metadata: Dict[str, Any]
-        embedding: List[float]
-
-    def chunk_text(text: str, chunk_size: int = 5000) -> List[str]:
-        """Split text into chunks, respecting code blocks and paragraphs."""
+    # Zendesk agent URL of a ticket, formatted with the ticket id
+    ZENDESK_SUBDOMAIN = os.getenv("ZENDESK_SUBDOMAIN")
+    TICKET_URL_FMT = f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/agent/tickets/{{}}"
+
+    # Row in zendesk_indexer_state holding the incremental export cursor
+    EXPORT_CURSOR_ID = "ticket_export"
+
+    # Model used for all embeddings
+    EMBEDDING_MODEL = "text-embedding-3-small"
+
+    # Target chunk size in tokens, well under the model's 8191-token input limit
+    CHUNK_TOKENS = 4000
+
+    # Maximum number of inputs sent in a single embeddings request
+    # (64 chunks of CHUNK_TOKENS stay under the 300k tokens allowed per request)
+    EMBEDDING_BATCH_SIZE = 64
+
+    # Maximum number of rows sent in a single Supabase upsert
+    INSERT_BATCH_SIZE = 500
+
+    # Number of rows buffered before they are bulk loaded with COPY
+    COPY_BATCH_SIZE = 5000
+
+    # zendesk_tickets columns written for each chunk, in COPY order
+    CHUNK_COLUMNS = ["url", "chunk_number", "title", "summary", "content", "metadata", "embedding"]
+
+    # Rows waiting to be bulk loaded with COPY
+    _copy_buffer = []
+
+    # Code block markers
+    _FENCE_RE = re.compile(r"```")
+
+    # BPE ranks downloaded at build time by the deployment workflow, so cold starts do not
+    # depend on fetching them from OpenAI's blob storage
+    TIKTOKEN_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ZendeskTicketIndexer", "tiktoken_cache")
+    if os.path.isdir(TIKTOKEN_CACHE_DIR):
+        os.environ.setdefault("TIKTOKEN_CACHE_DIR", TIKTOKEN_CACHE_DIR)
+
+    @functools.lru_cache(maxsize=1)
+    def get_encoder() -> "tiktoken.Encoding":
+        """
+        Get the tokenizer of the embedding model.
+        Loading it may download the BPE ranks (unless they were bundled, see TIKTOKEN_CACHE_DIR),
+        so it is loaded on first use and cached.
+        """
+        return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+
+    def _sentence_units(text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into (start, end) spans of whole sentences.
+        Sentences that open a code block are merged with the following ones up to the
+        closing marker, so a code block stays in one chunk whenever it fits.
+        """
+        fences = [m.start() for m in _FENCE_RE.finditer(text)]
+        spans = blingfire.text_to_sentences_and_offsets(text)[1]
+        units = []
+        i = 0
+        while i < len(spans):
+            start, end = spans[i]
+            # An odd number of markers before the end means a code block is still open
+            opened = bisect.bisect_right(fences, end - 3)
+            while opened % 2 == 1 and opened < len(fences):
+                close_end = fences[opened] + 3
+                while i + 1 < len(spans) and spans[i + 1][0] < close_end:
+                    i += 1
+                end = max(close_end, spans[i][1])
+                opened = bisect.bisect_right(fences, end - 3)
+            units.append((start, end))
+            i += 1
+        return units
+
+    def chunk_text(text: str, chunk_size: int = CHUNK_TOKENS) -> List[str]:
+        """
+        Split text into chunks of whole sentences, respecting code blocks.
+        Sentences are packed greedily while the chunk stays within chunk_size tokens.
+        The text is tokenized once; a sentence longer than chunk_size on its own is
+        split by slicing its tokens.
+        """
+        # Nothing to split
+        if not text or text.isspace():
+            return []
+
         chunks = []
-        start = 0
-        text_length = len(text)
 
-        while start < text_length:
-            # Calculate end position
-            end = start + chunk_size
+        def emit(start: int, end: int):
+            # Trim surrounding whitespace by index so each chunk is sliced only once
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start < end:
+                chunks.append(text[start:end])
 
-            # If we're at the end of the text, just take what's left
-            if end >= text_length:
-                chunks.append(text[start:].strip())
-                break
+        encoder = get_encoder()
+        units = _sentence_units(text)
+        # Each sentence is tokenized with the whitespace before it, so the counts add up to the chunk's
+        starts = [0] + [end for _, end in units[:-1]]
+        token_ids = [encoder.encode_ordinary(text[start:end]) for start, (_, end) in zip(starts, units)]
+        
+        if sum(len(ids) for ids in token_ids) <= chunk_size:
+            emit(0, len(text))
+            return chunks
 
-            # Try to find a code block boundary first (```)
-            chunk = text[start:end]
-            code_block = chunk.rfind('```')
+        chunk_start = chunk_end = None
+        chunk_tokens = 0
+        for piece_start, (start, end), ids in zip(starts, units, token_ids):
+            # Add the sentence to the current chunk if it still fits
+            if chunk_start is not None and chunk_tokens + len(ids) <= chunk_size:
+                chunk_end = end
+                chunk_tokens += len(ids)
+                continue
             
-            # If we found a code block marker and it's not at the very beginning
-            if code_block > 0 and code_block < end - 3:
-                # Find the next code block marker after this one
-                next_code_block = text.find('```', start + code_block + 3)
-                
-                # If there is a closing marker, include the entire code block
-                if next_code_block > 0:
-                    end = next_code_block + 3
-                    chunks.append(text[start:end].strip())
-                    start = end
-                    continue
+            if chunk_start is not None:
+                emit(chunk_start, chunk_end)
             
-            # Try to find a paragraph boundary
-            paragraph = chunk.rfind('\n\n')
-            if paragraph > 0:
-                end = start + paragraph
-                chunks.append(text[start:end].strip())
-                start = end
+            # Break up overly long sentences every chunk_size tokens, moving each cut back to
+            # the start of the character it falls in so multi-byte characters stay whole
+            if len(ids) > chunk_size:
+                _, offsets = encoder.decode_with_offsets(ids)
+                cuts = [piece_start + offsets[i] for i in range(chunk_size, len(ids), chunk_size)]
+                for cut_start, cut_end in zip([piece_start] + cuts, cuts + [end]):
+                    emit(cut_start, cut_end)
+                chunk_start = None
                 continue
+            chunk_start, chunk_end, chunk_tokens = start, end, len(ids)
             
-            # If we can't find a good boundary, just use the chunk size
-            chunks.append(text[start:end].strip())
-            start = end
-            
+        if chunk_start is not None:
+            emit(chunk_start, chunk_end)
         return chunks
 
-    async def get_embedding(text: str) -> List[float]:
-        """Get embedding vector from OpenAI."""
-        if not text.strip():
-            return []
-        
-        response = await openai_client.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
-        )
-        return response.data[0].embedding
+    @retry(
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+        retry=retry_if_exception_type((RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)),
+        reraise=True
+    )
+    async def create_embeddings(texts: List[str]):
+        """Request embeddings from OpenAI, rate limited and retried with exponential backoff."""
+        async with openai_limiter:
+            return await openai_client.embeddings.create(
+                input=texts,
+                model=EMBEDDING_MODEL
+            )
 
-    async def process_chunk(chunk: str, chunk_number: int, ticket: Dict[str, Any]) -> ProcessedChunk:
-        """Process a single chunk of text."""
-        # Get embedding for the chunk
-        embedding = await get_embedding(chunk)
+    async def get_embeddings(texts: List[str]) -> List[Optional["np.ndarray"]]:
+        """
+        Get embedding vectors from OpenAI for many texts at once.
+        Each distinct text is embedded only once, EMBEDDING_BATCH_SIZE texts per request.
+        Embeddings are returned as float16 arrays, matching the halfvec column they are
+        stored in; empty texts get None.
+        """
+        # Repeated chunks (signatures, auto-replies, quoted messages) share one embedding
+        unique_texts = list(dict.fromkeys(text for text in texts if text.strip()))
+        embedding_by_text = {}
         
-        # Create a URL for the ticket
-        subdomain = os.getenv("ZENDESK_SUBDOMAIN")
-        url = f"https://{subdomain}.zendesk.com/agent/tickets/{ticket['id']}"
+        for start in range(0, len(unique_texts), EMBEDDING_BATCH_SIZE):
+            batch = unique_texts[start:start + EMBEDDING_BATCH_SIZE]
+            response = await create_embeddings(batch)
+            for data in response.data:
+                embedding_by_text[batch[data.index]] = np.asarray(data.embedding, dtype=np.float16)
         
-        # Create metadata
-        metadata = {
+        return [embedding_by_text.get(text) for text in texts]
+
+    def ticket_metadata(ticket: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the metadata stored with every chunk of a ticket."""
+        return {
             "ticket_id": ticket['id'],
             "created_at": ticket['created_at'],
             "updated_at": ticket['updated_at'],
@@ -182,59 +408,191 @@ if DEPENDENCIES_AVAILABLE:
             "tags": ticket['tags'],
             "source": "zendesk"
         }
-        
-        # Create a summary (just use the subject for now)
-        summary = ticket['subject']
-        
-        return ProcessedChunk(
-            url=url,
-            chunk_number=chunk_number,
-            title=ticket['subject'],
-            summary=summary,
-            content=chunk,
-            metadata=metadata,
-            embedding=embedding
-        )
 
-    async def insert_chunk(chunk: ProcessedChunk):
-        """Insert a processed chunk into Supabase."""
-        # Convert the chunk to a dictionary
-        chunk_dict = {
-            "url": chunk.url,
-            "chunk_number": chunk.chunk_number,
-            "title": chunk.title,
-            "summary": chunk.summary,
-            "content": chunk.content,
-            "metadata": chunk.metadata,
-            "embedding": chunk.embedding
+    def process_chunk(chunk: str, chunk_number: int, url: str, title: str, ticket_meta: Dict[str, Any],
+                      embedding: Optional["np.ndarray"]) -> Dict[str, Any]:
+        """
+        Build the zendesk_tickets row for a single chunk with its precomputed embedding.
+        The url, title and metadata are built once per ticket and shared by all its chunks.
+        """
+        return {
+            "url": url,
+            "chunk_number": chunk_number,
+            "title": title,
+            # Create a summary (just use the subject for now)
+            "summary": title,
+            "content": chunk,
+            "metadata": ticket_meta,
+            "embedding": embedding
         }
+
+    def embedding_literal(embedding: Optional["np.ndarray"]) -> Optional[str]:
+        """
+        Serialize an embedding as a pgvector text literal for the Supabase REST API.
+        orjson is used so the Supabase client only has to copy a string instead of
+        encoding 1536 floats. orjson cannot serialize float16 arrays, so the half-precision
+        values are widened to float32 first (which keeps their short representation).
+        """
+        if embedding is None:
+            return None
+        return orjson.dumps(embedding.astype(np.float32), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    @retry(
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+        retry=retry_if_exception(is_transient_supabase_error),
+        reraise=True
+    )
+    async def upsert_rows(rows: List[Dict[str, Any]]):
+        """
+        Upsert rows into zendesk_tickets, retried with exponential backoff on network errors
+        and 429/5xx responses.
+        The stored rows are not sent back (return=minimal), so the response stays empty.
+        """
+        return await supabase.from_("zendesk_tickets").upsert(
+            rows, returning=ReturnMethod.minimal, on_conflict="url,chunk_number"
+        ).execute()
+
+    async def copy_rows(rows: List[Dict[str, Any]]):
+        """
+        Upsert rows into zendesk_tickets through Postgres COPY.
+        The rows are streamed in binary format into a temporary table and merged into
+        zendesk_tickets with a single INSERT ... ON CONFLICT.
+        """
+        columns = ", ".join(CHUNK_COLUMNS)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in CHUNK_COLUMNS[2:])
+        
+        async with db_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    f"CREATE TEMP TABLE zendesk_tickets_load ON COMMIT DROP AS "
+                    f"SELECT {columns} FROM zendesk_tickets WITH NO DATA"
+                )
+                await conn.copy_records_to_table(
+                    "zendesk_tickets_load",
+                    records=[
+                        (row["url"], row["chunk_number"], row["title"], row["summary"], row["content"],
+                         orjson.dumps(row["metadata"]).decode(), row["embedding"])
+                        for row in rows
+                    ],
+                    columns=CHUNK_COLUMNS
+                )
+                await conn.execute(
+                    f"INSERT INTO zendesk_tickets ({columns}) SELECT {columns} FROM zendesk_tickets_load "
+                    f"ON CONFLICT (url, chunk_number) DO UPDATE SET {updates}"
+                )
+
+    async def flush_copy_buffer():
+        """
+        Bulk load the buffered chunk rows with COPY.
+        A failure is raised rather than logged: the buffer holds the rows of many tickets,
+        so the run fails and the export cursor is not advanced past them.
+        If COPY rejects the data itself (e.g. a NUL byte in a comment), the rows are stored
+        per ticket through the REST API instead, so only the offending tickets are skipped.
+        """
+        global _copy_buffer
+        rows, _copy_buffer = _copy_buffer, []
+        if not rows:
+            return
         
         try:
-            # First check if the record exists
-            response = supabase.table("zendesk_tickets").select("*").eq("url", chunk.url).eq("chunk_number", chunk.chunk_number).execute()
-            
-            if response.data and len(response.data) > 0:
-                # Record exists, update it
-                logging.info(f"Updating existing record for {chunk.url}, chunk {chunk.chunk_number}")
-                response = supabase.table("zendesk_tickets").update(chunk_dict).eq("url", chunk.url).eq("chunk_number", chunk.chunk_number).execute()
-            else:
-                # Record doesn't exist, insert it
-                logging.info(f"Inserting new record for {chunk.url}, chunk {chunk.chunk_number}")
-                response = supabase.table("zendesk_tickets").insert(chunk_dict).execute()
-            
-            # Check for errors
-            if hasattr(response, 'error') and response.error:
-                logging.error(f"Error storing chunk: {response.error}")
-                raise Exception(f"Supabase error: {response.error}")
+            await copy_rows(rows)
+        except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as e:
+            logging.error(f"Error bulk loading {len(rows)} chunks, storing them per ticket instead: {str(e)}")
+            rows_by_ticket = {}
+            for row in rows:
+                rows_by_ticket.setdefault(row["metadata"]["ticket_id"], []).append(row)
+            for ticket_rows in rows_by_ticket.values():
+                if not await upsert_chunk_rows(ticket_rows):
+                    raise Exception("Chunks could not be stored per ticket after a failed bulk load")
+            return
+        except Exception as e:
+            logging.error(f"Error bulk loading {len(rows)} chunks: {str(e)}")
+            raise
+        logging.info(f"Bulk loaded {len(rows)} chunks into Supabase")
+
+    async def upsert_chunk_rows(rows: List[Dict[str, Any]]) -> bool:
+        """
+        Store the chunk rows of one ticket through the REST API, one upsert per INSERT_BATCH_SIZE rows.
+        Rows that Supabase rejects permanently (a 4xx response) are logged with the ticket id
+        and skipped. Returns False if a batch failed with a transient error, so the run can
+        keep the export cursor and retry the ticket.
+        """
+        for row in rows:
+            row["embedding"] = embedding_literal(row["embedding"])
+        
+        stored = True
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            batch = rows[start:start + INSERT_BATCH_SIZE]
+            ticket_id = batch[0]["metadata"]["ticket_id"]
+            try:
+                response = await upsert_rows(batch)
                 
+                # Check for errors
+                if hasattr(response, 'error') and response.error:
+                    logging.error(f"Error storing chunks: {response.error}")
+                    raise Exception(f"Supabase error: {response.error}")
+                    
+            except Exception as e:
+                # Continue processing other tickets even if one batch fails
+                # This prevents the entire run from failing due to one error
+                if is_transient_supabase_error(e):
+                    logging.error(f"Error storing {len(batch)} chunks for ticket #{ticket_id}: {str(e)}")
+                    stored = False
+                else:
+                    logging.error(f"Supabase rejected {len(batch)} chunks for ticket #{ticket_id}, skipping them: {str(e)}")
+        return stored
+
+    async def insert_chunks(rows: List[Dict[str, Any]]) -> bool:
+        """
+        Store processed chunk rows in Supabase; existing rows with the same url and
+        chunk_number are updated.
+        With a Postgres pool the rows are buffered and bulk loaded COPY_BATCH_SIZE at a time,
+        otherwise they are sent through the REST API (see upsert_chunk_rows).
+        Returns False if some rows failed with a transient error; a failed COPY raises.
+        """
+        if db_pool is not None:
+            _copy_buffer.extend(rows)
+            if len(_copy_buffer) >= COPY_BATCH_SIZE:
+                await flush_copy_buffer()
+            return True
+        return await upsert_chunk_rows(rows)
+
+    @retry(
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+        retry=retry_if_exception(is_transient_supabase_error),
+        reraise=True
+    )
+    async def load_export_cursor() -> Optional[str]:
+        """
+        Load the Zendesk incremental export cursor saved by the previous run.
+        Only a missing row means there is no cursor (and a full export is run); errors are
+        retried like upserts and then fail the run, rather than silently re-exporting everything.
+        """
+        response = await supabase.from_("zendesk_indexer_state").select("cursor").eq("id", EXPORT_CURSOR_ID).execute()
+        if response.data:
+            return response.data[0]["cursor"]
+        return None
+
+    async def save_export_cursor(cursor: Optional[str]):
+        """Save the Zendesk incremental export cursor so the next run only fetches changes."""
+        if not cursor:
+            return
+        try:
+            await supabase.from_("zendesk_indexer_state").upsert({
+                "id": EXPORT_CURSOR_ID,
+                "cursor": cursor,
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }).execute()
         except Exception as e:
-            logging.error(f"Error storing chunk: {str(e)}")
-            # Continue processing other chunks even if one fails
-            # This prevents the entire batch from failing due to one error
-            pass
+            logging.error(f"Error saving export cursor: {str(e)}")
 
-    async def process_and_store_ticket(ticket: Dict[str, Any]):
-        """Process a ticket and store its chunks in parallel."""
+    async def process_and_store_ticket(ticket: Dict[str, Any]) -> bool:
+        """
+        Process a ticket and store its chunks in parallel.
+        Returns False if some of its chunks could not be stored.
+        """
         # Check if comments is a list and join them if needed
         if isinstance(ticket['comments'], list):
             logging.info(f"Ticket #{ticket['id']} has {len(ticket['comments'])} comments as a list, joining them")
@@ -245,23 +603,29 @@ if DEPENDENCIES_AVAILABLE:
             
         # Get chunks from the ticket comments
         chunks = chunk_text(comments_text)
+        if not chunks:
+            logging.info(f"Ticket #{ticket['id']} has no comment text, skipping")
+            return True
         logging.info(f"Ticket #{ticket['id']} split into {len(chunks)} chunks")
         
-        # Process chunks in parallel
-        tasks = [
-            process_chunk(chunk, i, ticket) 
-            for i, chunk in enumerate(chunks)
+        # Embed all chunks of the ticket in as few requests as possible
+        embeddings = await get_embeddings(chunks)
+        url = TICKET_URL_FMT.format(ticket['id'])
+        ticket_meta = ticket_metadata(ticket)
+        processed_chunks = [
+            process_chunk(chunk, i, url, ticket['subject'], ticket_meta, embedding)
+            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
         ]
-        processed_chunks = await asyncio.gather(*tasks)
         logging.info(f"Processed {len(processed_chunks)} chunks for ticket #{ticket['id']}")
         
-        # Store chunks in parallel
-        insert_tasks = [
-            insert_chunk(chunk) 
-            for chunk in processed_chunks
-        ]
-        await asyncio.gather(*insert_tasks)
-        logging.info(f"Stored {len(processed_chunks)} chunks in Supabase for ticket #{ticket['id']}")
+        # Store all chunks of the ticket in bulk
+        if not await insert_chunks(processed_chunks):
+            return False
+        if db_pool is not None:
+            logging.info(f"Buffered {len(processed_chunks)} chunks for bulk loading for ticket #{ticket['id']}")
+        else:
+            logging.info(f"Stored {len(processed_chunks)} chunks in Supabase for ticket #{ticket['id']}")
+        return True
 
 async def main():
     """Main function that runs the Zendesk ticket indexing process."""
@@ -283,37 +647,72 @@ async def main():
     for var in env_vars:
         logging.info(f"{var} exists: {'Yes' if os.getenv(var) else 'No'}")
     
+    global openai_client, supabase, db_pool, _copy_buffer
+    openai_client = create_openai_client()
+    supabase = create_supabase_client()
+    db_pool = None
+    _copy_buffer = []
     try:
-        config = ZendeskConfig.from_env()
-        zendesk = ZendeskAPI(config)
-        tickets = zendesk.get_ticket_details()
+        db_pool = await create_db_pool()
+        logging.info("Storing chunks with Postgres COPY" if db_pool is not None else "Storing chunks through the Supabase REST API")
         
-        logging.info(f"Found {len(tickets)} tickets to process")
-        
-        # Log the URLs of all tickets that will be processed
-        subdomain = os.getenv("ZENDESK_SUBDOMAIN")
-        logging.info("Tickets to be processed:")
-        for ticket in tickets:
-            ticket_url = f"https://{subdomain}.zendesk.com/agent/tickets/{ticket['id']}"
-            logging.info(f"- Ticket #{ticket['id']}: {ticket['subject']} ({ticket_url})")
+        config = ZendeskConfig.from_env()
+        export_cursor = await load_export_cursor()
+        logging.info("Resuming from saved export cursor" if export_cursor else "No export cursor saved, running a full export")
         
-        # Process tickets with progress tracking
+        # Fetch tickets while INDEX_CONCURRENCY workers embed and store the ones already fetched,
+        # with at most 64 fetched tickets waiting
+        n_workers = int(os.getenv("INDEX_CONCURRENCY", "8"))
+        queue = asyncio.Queue(maxsize=64)
         processed_count = 0
-        for ticket in tickets:
-            ticket_url = f"https://{subdomain}.zendesk.com/agent/tickets/{ticket['id']}"
-            logging.info(f"Processing ticket #{ticket['id']}: {ticket['subject']}")
-            
-            await process_and_store_ticket(ticket)
-            
-            processed_count += 1
-            logging.info(f"Completed processing ticket #{ticket['id']} ({processed_count}/{len(tickets)})")
+        failed_count = 0
+
+        async with ZendeskAPI(config) as zendesk:
+            async def producer():
+                async for ticket in zendesk.iter_ticket_details(cursor=export_cursor):
+                    await queue.put(ticket)
+                # One end marker per worker
+                for _ in range(n_workers):
+                    await queue.put(None)
+
+            async def worker():
+                nonlocal processed_count, failed_count
+                while (ticket := await queue.get()) is not None:
+                    logging.info(f"Processing ticket #{ticket['id']}: {ticket['subject']} ({ticket['url']})")
+                    if not await process_and_store_ticket(ticket):
+                        failed_count += 1
+                    processed_count += 1
+                    logging.info(f"Completed processing ticket #{ticket['id']} ({processed_count} processed)")
+
+            # If any task fails, the task group cancels the others before the clients are closed
+            try:
+                async with asyncio.TaskGroup() as task_group:
+                    task_group.create_task(producer())
+                    for _ in range(n_workers):
+                        task_group.create_task(worker())
+            except ExceptionGroup as e:
+                raise e.exceptions[0]
+        
+        # Store the rows still waiting for a COPY
+        await flush_copy_buffer()
         
+        # Keep the previous cursor if anything failed to store for a transient reason,
+        # so the next run retries those tickets
+        if failed_count:
+            logging.error(f"Chunks of {failed_count} tickets could not be stored, keeping the previous export cursor")
+        else:
+            await save_export_cursor(zendesk.after_cursor)
         logging.info(f"Zendesk ticket indexing completed. Processed {processed_count} tickets.")
     except Exception as e:
         logging.error(f"Error during Zendesk ticket indexing: {str(e)}")
         import traceback
         logging.error(f"Traceback: {traceback.format_exc()}")
         raise
+    finally:
+        await supabase.aclose()
+        await openai_client.close()
+        if db_pool is not None:
+            await db_pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())